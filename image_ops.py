@@ -0,0 +1,369 @@
+import multiprocessing
+import os
+import numpy as np
+import cv2
+from io import BytesIO
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from joblib import Parallel, delayed
+
+PREVIEW_WIDTH = 1024
+
+METHODS = {
+    'Nearest Neighbor': cv2.INTER_NEAREST,
+    'Bilinear': cv2.INTER_LINEAR,
+    'Bicubic': cv2.INTER_CUBIC,
+    'Lanczos': cv2.INTER_LANCZOS4
+}
+
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+FORMATS = {
+    'WebP': ('.webp', [cv2.IMWRITE_WEBP_QUALITY, 95], 'image/webp'),
+    'PNG': ('.png', [cv2.IMWRITE_PNG_COMPRESSION, 1], 'image/png')
+}
+
+WEBP_MAX_DIMENSION = 16383
+
+REDUCED_JPEG_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+)
+
+def warm_up():
+    """
+    Size OpenCV's thread pool to the machine and spin up its workers
+
+    OpenCV creates its worker threads lazily, so without this the first
+    resize after startup also pays for thread creation.
+    """
+    cv2.setNumThreads(os.cpu_count() or 4)
+    cv2.resize(np.zeros((256, 256, 3), np.uint8), (512, 512), interpolation=cv2.INTER_LANCZOS4)
+
+def encode_image(img_array, fmt='WebP'):
+    """
+    Encode an image array for download
+
+    WebP at quality 95 encodes much faster and smaller than PNG; PNG uses
+    compression level 1, trading some file size for a faster encode.
+
+    :param img_array: Image as a numpy array in OpenCV (BGR) channel order
+    :param fmt: Key of FORMATS to encode as
+    :return: Encoded image bytes
+    """
+    ext, params, _ = FORMATS[fmt]
+    ok, buf = cv2.imencode(ext, img_array, params)
+    if not ok:
+        raise ValueError(f'Could not encode {img_array.shape[1]}x{img_array.shape[0]} image as {fmt}')
+    return buf.tobytes()
+
+def download_format(fmt, size):
+    """
+    Pick the format to encode a download of the given size as
+
+    WebP cannot store images larger than WEBP_MAX_DIMENSION on either side,
+    so those fall back to PNG.
+
+    :param fmt: Key of FORMATS the user selected
+    :param size: (width, height) of the image to encode
+    :return: Key of FORMATS to encode as
+    """
+    if fmt == 'WebP' and max(size) > WEBP_MAX_DIMENSION:
+        return 'PNG'
+    return fmt
+
+def resolve_folder(folder_path, root):
+    """
+    Resolve a folder path inside a root directory
+
+    :param folder_path: Folder path, relative to root
+    :param root: Directory that reads are restricted to
+    :return: Absolute, symlink-free path of the folder
+    :raises PermissionError: If the path resolves to somewhere outside root
+    """
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, folder_path))
+    if os.path.commonpath([root, path]) != root:
+        raise PermissionError(f'{folder_path} is outside the allowed folder')
+    return path
+
+def list_images(folder_path, root):
+    """
+    List the supported image files directly inside a folder under root
+
+    Only directory entries are read, not file contents. Files that are
+    symlinks pointing outside root are skipped.
+
+    :param folder_path: Folder path, relative to root
+    :param root: Directory that reads are restricted to
+    :return: Tuple of (path, size in bytes, modification time in ns) tuples, sorted by path
+    """
+    real_root = os.path.realpath(root)
+    images = []
+    with os.scandir(resolve_folder(folder_path, root)) as entries:
+        for entry in entries:
+            if not (entry.is_file() and entry.name.lower().endswith(SUPPORTED_EXTENSIONS)):
+                continue
+            if os.path.commonpath([real_root, os.path.realpath(entry.path)]) != real_root:
+                continue
+            stat = entry.stat()
+            images.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(images))
+
+def read_files(paths):
+    """
+    Read image files from disk
+
+    :param paths: Iterable of file paths
+    :return: Tuple of (file name, raw file bytes) tuples
+    """
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            files.append((os.path.basename(path), f.read()))
+    return tuple(files)
+
+def decode_image(img_bytes):
+    """
+    Decode raw image file bytes
+
+    JPEGs already go through libjpeg-turbo here: the opencv-python wheels
+    bundle it, so there is no need for a separate TurboJPEG binding.
+
+    16-bit images (e.g. 16-bit PNGs) are reduced to 8 bits so every resize
+    stays on OpenCV's uint8 kernels.
+
+    :param img_bytes: Raw bytes of the uploaded image file
+    :return: uint8 image as a numpy array in OpenCV (BGR) channel order
+    """
+    img_array = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img_array is None:
+        raise ValueError('Could not decode image')
+    if img_array.dtype == np.uint16:
+        img_array = (img_array >> 8).astype(np.uint8)
+    return img_array
+
+def _decode_reduced(img_bytes, min_width):
+    """
+    Decode an image for previewing, at reduced scale where possible
+
+    JPEGs are decoded by libjpeg at the largest 1/2, 1/4 or 1/8 scale whose
+    width still covers min_width; everything else is decoded in full.
+
+    :param img_bytes: Raw bytes of the uploaded image file
+    :param min_width: Smallest width the decoded image must have
+    :return: Tuple of (original (width, height), decoded numpy array)
+    """
+    if img_bytes[:3] == b'\xff\xd8\xff':
+        # Only the header is parsed here; it gives the true size without decoding
+        width, height = Image.open(BytesIO(img_bytes)).size
+        for factor, flag in REDUCED_JPEG_FLAGS:
+            if -(-width // factor) >= min_width:
+                img_array = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), flag | cv2.IMREAD_IGNORE_ORIENTATION)
+                if img_array is None:
+                    raise ValueError('Could not decode image')
+                return (width, height), img_array
+
+    img_array = decode_image(img_bytes)
+    height, width = img_array.shape[:2]
+    return (width, height), img_array
+
+def scaled_size(img_array, scale_factor):
+    """
+    Compute the (width, height) of an image array after scaling
+
+    Both dimensions are kept at least 1, so very thin images can still be
+    shrunk without collapsing to an empty size.
+
+    :param img_array: Image as a numpy array
+    :param scale_factor: Factor by which to scale the image
+    :return: Tuple of (width, height)
+    """
+    height, width = img_array.shape[:2]
+    return max(1, int(width * scale_factor)), max(1, int(height * scale_factor))
+
+def thumbnail(img_array, max_width=PREVIEW_WIDTH):
+    """
+    Shrink an image array to at most max_width, keeping its aspect ratio
+
+    :param img_array: Image as a numpy array
+    :param max_width: Maximum width of the returned image
+    :return: The input array if it already fits, otherwise a shrunk copy
+    """
+    width = img_array.shape[1]
+    if width <= max_width:
+        return img_array
+    return cv2.resize(img_array, scaled_size(img_array, max_width / width), interpolation=cv2.INTER_AREA)
+
+def to_display(img_array):
+    """
+    Convert an OpenCV image array to the channel order browsers expect
+
+    :param img_array: Image as a numpy array in OpenCV (BGR/BGRA) channel order
+    :return: Grayscale, RGB or RGBA numpy array; alpha is kept
+    """
+    if img_array.ndim == 2:
+        return img_array
+    if img_array.shape[2] == 4:
+        return cv2.cvtColor(img_array, cv2.COLOR_BGRA2RGBA)
+    return cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
+
+def _resize_into(img_array, dst, method_code, scale_factor):
+    """
+    Resize an image array into a preallocated output array
+
+    Nearest neighbor at an integer scale factor is a plain block repeat, so
+    it is written with a broadcast copy instead of going through cv2.resize.
+
+    :param img_array: Image as a numpy array
+    :param dst: Output array of the scaled shape and the input's dtype
+    :param method_code: OpenCV interpolation constant
+    :param scale_factor: Factor by which to scale the image
+    :return: dst
+    """
+    if method_code == cv2.INTER_NEAREST and scale_factor == int(scale_factor):
+        height, width = img_array.shape[:2]
+        factor = int(scale_factor)
+        blocks = dst.reshape((height, factor, width, factor) + img_array.shape[2:])
+        blocks[...] = img_array[:, None, :, None]
+    else:
+        cv2.resize(img_array, dst.shape[1::-1], dst=dst, interpolation=method_code)
+    return dst
+
+def _scaled_empty(img_array, scale_factor, count=None):
+    """
+    Allocate an uninitialised output array for a scaled image
+
+    :param img_array: Image as a numpy array
+    :param scale_factor: Factor by which to scale the image
+    :param count: If given, allocate a stack of this many outputs
+    :return: Empty numpy array with the input's dtype
+    """
+    new_width, new_height = scaled_size(img_array, scale_factor)
+    shape = (new_height, new_width) + img_array.shape[2:]
+    return np.empty(shape if count is None else (count,) + shape, dtype=img_array.dtype)
+
+def resize_image(img_array, scale_factor=2, n_jobs=len(METHODS)):
+    """
+    Resize image using different interpolation methods
+
+    :param img_array: Image as a numpy array
+    :param scale_factor: Factor by which to scale the image
+    :param n_jobs: Number of threads to spread the methods over
+    :return: Dict of method name to resized numpy array (BGR channel order)
+    """
+    # One allocation for all methods; each resize writes into its own slice
+    dst_stack = _scaled_empty(img_array, scale_factor, count=len(METHODS))
+
+    # OpenCV releases the GIL while resizing, so the methods run in parallel threads
+    Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_resize_into)(img_array, dst, method, scale_factor)
+        for dst, method in zip(dst_stack, METHODS.values())
+    )
+
+    return dict(zip(METHODS, dst_stack))
+
+def resize_one(img_bytes, scale_factor, method):
+    """
+    Resize an image at full resolution with a single interpolation method
+
+    :param img_bytes: Raw bytes of the uploaded image file
+    :param scale_factor: Factor by which to scale the image
+    :param method: Key of METHODS to resize with
+    :return: Resized numpy array (BGR channel order)
+    """
+    img_array = decode_image(img_bytes)
+    return _resize_into(img_array, _scaled_empty(img_array, scale_factor), METHODS[method], scale_factor)
+
+def preview_image(img_bytes, scale_factor=2, max_width=PREVIEW_WIDTH, n_jobs=len(METHODS)):
+    """
+    Build the on-screen previews for an image: the original, and the image
+    resized with every interpolation method
+
+    The source is decoded at reduced scale (for JPEGs) and shrunk once up
+    front, so the original preview is at most max_width wide and each method
+    only upscales into the preview width. Every preview still shows its own
+    method at the requested scale factor; the full-resolution result is left
+    to resize_one.
+
+    :param img_bytes: Raw bytes of the uploaded image file
+    :param scale_factor: Factor by which to scale the image
+    :param max_width: Maximum width of the preview images
+    :param n_jobs: Number of threads to spread the methods over
+    :return: Tuple of (original (width, height), RGB(A) original preview array,
+        full-resolution (width, height), dict of method name to RGB(A) preview array)
+    """
+    (width, height), img_array = _decode_reduced(img_bytes, max_width)
+    full_size = max(1, int(width * scale_factor)), max(1, int(height * scale_factor))
+    original = thumbnail(img_array, max_width)
+    previews = resize_image(thumbnail(original, max_width / scale_factor), scale_factor, n_jobs)
+    return (
+        (width, height),
+        to_display(original),
+        full_size,
+        {name: to_display(arr) for name, arr in previews.items()}
+    )
+
+def _init_worker():
+    """
+    Keep OpenCV single-threaded inside pool workers
+
+    The pool already runs one file per CPU, so letting each worker start
+    its own OpenCV thread pool as well would oversubscribe the machine.
+    """
+    cv2.setNumThreads(1)
+
+def make_pool():
+    """
+    Create a process pool for process_files
+
+    Workers come from a forkserver rather than being forked from the caller,
+    which may be a multi-threaded server that is unsafe to fork.
+
+    :return: ProcessPoolExecutor with one worker per CPU
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context('forkserver'),
+        initializer=_init_worker
+    )
+
+def _process_one(item, scale_factor, n_jobs=len(METHODS)):
+    """
+    Build the previews for a single uploaded file
+
+    :param item: Tuple of (file name, raw file bytes)
+    :param scale_factor: Factor by which to scale the image
+    :param n_jobs: Number of threads to spread the methods over
+    :return: Tuple of (file name, preview_image result or None, error message or None)
+    """
+    name, img_bytes = item
+    try:
+        return name, preview_image(img_bytes, scale_factor, n_jobs=n_jobs), None
+    except Exception as e:
+        return name, None, str(e)
+
+def process_files(files, scale_factor=2, executor=None):
+    """
+    Build previews for several uploaded files in parallel across worker processes
+
+    Streamlit calls cannot be made from the workers, so errors are returned
+    alongside the results for the caller to report. A single file is handled
+    in-process, since a pool would only add pickling cost. Inside the pool
+    each file resizes its methods serially; the parallelism is across files.
+
+    :param files: Sequence of (file name, raw file bytes) tuples
+    :param scale_factor: Factor by which to scale the images
+    :param executor: Long-lived pool from make_pool; a temporary one is used if omitted
+    :return: List of (file name, preview_image result or None, error message or None)
+    """
+    if len(files) == 1:
+        return [_process_one(files[0], scale_factor)]
+
+    work = partial(_process_one, scale_factor=scale_factor, n_jobs=1)
+    if executor is not None:
+        return list(executor.map(work, files))
+    with make_pool() as executor:
+        return list(executor.map(work, files))
@@ -1,89 +1,215 @@
+import os
 import streamlit as st
-from PIL import Image
-import numpy as np
-import cv2
-from io import BytesIO
+import xxhash
+from functools import partial
+from image_ops import (
+    FORMATS, SUPPORTED_EXTENSIONS, download_format, encode_image, list_images, make_pool, process_files,
+    read_files, resize_one, warm_up
+)
 
-def resize_image(image, scale_factor=2):
+# Folder mode reads from the server's disk, so it is only offered when the
+# server operator opts in by pointing this at the directory to expose
+FOLDER_ROOT = os.environ.get('IMAGEUP_FOLDER_ROOT')
+
+MODES = ('Single image', 'Multiple images') + (('Folder',) if FOLDER_ROOT else ())
+
+# Folder mode shows this many images per page
+FOLDER_PAGE_SIZE = 20
+
+FOLDER_CACHE_ENTRIES = 4
+
+PREVIEW_CACHE_ENTRIES = 8
+
+DOWNLOAD_CACHE_ENTRIES = 8
+
+@st.cache_resource(show_spinner=False)
+def init_opencv():
+    """
+    Warm up OpenCV once per Streamlit server rather than once per session
+    """
+    warm_up()
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """
+    Share one process pool across all sessions and reruns
+    """
+    return make_pool()
+
+@st.cache_resource(show_spinner=False, max_entries=FOLDER_CACHE_ENTRIES)
+def load_folder_page(entries):
+    """
+    Read a page of folder images, memoized across reruns
+
+    The cache is keyed on each file's path, size and modification time, so
+    files are only read again when they change on disk. Those same fields
+    stand in for the content hash, so the bytes are never hashed.
+
+    :param entries: Tuple of (path, size, modification time) tuples from list_images
+    :return: Tuple of (files as (file name, raw file bytes) tuples, file keys)
     """
-    Resize image using different interpolation methods
+    files = read_files(path for path, _, _ in entries)
+    file_keys = tuple(xxhash.xxh3_64_hexdigest(repr(entry).encode()) for entry in entries)
+    return files, file_keys
 
-    :param image: PIL Image to resize
+@st.cache_resource(show_spinner=False, max_entries=PREVIEW_CACHE_ENTRIES)
+def resize_files(file_keys, _files, scale_factor=2):
+    """
+    Build resize previews for uploaded files, memoized across reruns
+
+    The cache is keyed on file_keys; _files is excluded from hashing so the
+    uploaded bytes are not rehashed on every rerun. The previews are only
+    read, so they are held as a shared resource rather than copied out of
+    the cache on every rerun, and only the most recent PREVIEW_CACHE_ENTRIES
+    file sets and scale factors are kept.
+
+    :param file_keys: Tuple of content hashes, one per file
+    :param _files: Tuple of (file name, raw file bytes) tuples
+    :param scale_factor: Factor by which to scale the images
+    :return: List of (file name, preview_image result or None, error message or None)
+    """
+    return process_files(_files, scale_factor, get_pool())
+
+@st.cache_data(show_spinner=False, max_entries=DOWNLOAD_CACHE_ENTRIES)
+def encode_download(file_key, _img_bytes, scale_factor, method, fmt):
+    """
+    Resize an image at full resolution and encode it for download, memoized
+    so repeated clicks are free
+
+    Only the most recent DOWNLOAD_CACHE_ENTRIES encodes are kept, so memory
+    stays bounded no matter how many files are uploaded.
+
+    :param file_key: Content hash of the uploaded image file
+    :param _img_bytes: Raw bytes of the uploaded image file, excluded from hashing
     :param scale_factor: Factor by which to scale the image
-    :return: Resized PIL Image
+    :param method: Key of METHODS to resize with
+    :param fmt: Key of FORMATS to encode as
+    :return: Encoded image bytes
     """
-    img_array = np.array(image)
+    return encode_image(resize_one(_img_bytes, scale_factor, method), fmt)
 
-    # Get original dimensions
-    height, width = img_array.shape[:2]
-    new_width = int(width * scale_factor)
-    new_height = int(height * scale_factor)
+def get_folder_files():
+    """
+    Collect one page of images from a folder under FOLDER_ROOT
 
-    # Resize using different methods
-    methods = {
-        'Nearest Neighbor': cv2.INTER_NEAREST,
-        'Bilinear': cv2.INTER_LINEAR,
-        'Bicubic': cv2.INTER_CUBIC,
-        'Lanczos': cv2.INTER_LANCZOS4
-    }
+    :return: Tuple of (files as (file name, raw file bytes) tuples, file keys)
+    """
+    folder_path = st.text_input('Folder path', help="Folder of images to resize, relative to the server's image folder")
+    if not folder_path:
+        return (), ()
+    try:
+        entries = list_images(folder_path, FOLDER_ROOT)
+    except OSError as e:
+        st.error(f"Error reading folder {folder_path}: {e}")
+        return (), ()
+
+    # Apply the same size limit as the uploader
+    max_bytes = st.get_option('server.maxUploadSize') * 1024 * 1024
+    too_large = [path for path, size, _ in entries if size > max_bytes]
+    if too_large:
+        st.warning(f"Skipping {len(too_large)} file(s) larger than {st.get_option('server.maxUploadSize')} MB")
+        entries = tuple(entry for entry in entries if entry[1] <= max_bytes)
+    if not entries:
+        st.info(f"No supported images found in {folder_path}")
+        return (), ()
+
+    pages = -(-len(entries) // FOLDER_PAGE_SIZE)
+    page = st.number_input('Page', min_value=1, max_value=pages, value=1) if pages > 1 else 1
+    start = (page - 1) * FOLDER_PAGE_SIZE
+    page_entries = entries[start:start + FOLDER_PAGE_SIZE]
+    st.caption(f'Showing images {start + 1}-{start + len(page_entries)} of {len(entries)}')
+    return load_folder_page(page_entries)
+
+def get_files(mode):
+    """
+    Collect the images to resize for the selected input mode
 
-    resized_images = {}
-    for name, method in methods.items():
-        resized = cv2.resize(img_array, (new_width, new_height), interpolation=method)
-        resized_images[name] = Image.fromarray(resized)
+    Uploaded files are hashed once here; every cache downstream is keyed on
+    these short digests.
 
-    return resized_images
+    :param mode: One of MODES
+    :return: Tuple of (files as (file name, raw file bytes) tuples, file keys)
+    """
+    if mode == 'Folder':
+        return get_folder_files()
+
+    accepted_types = [extension.lstrip('.') for extension in SUPPORTED_EXTENSIONS]
+    if mode == 'Single image':
+        uploaded_file = st.file_uploader(
+            "Choose an image",
+            type=accepted_types,
+            help="Upload an image file to resize"
+        )
+        uploaded_files = [uploaded_file] if uploaded_file is not None else []
+    else:
+        uploaded_files = st.file_uploader(
+            "Upload multiple image files",
+            type=accepted_types,
+            accept_multiple_files=True,
+            help="Select multiple image files to resize"
+        )
+
+    files = tuple((uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files)
+    file_keys = tuple(xxhash.xxh3_64_hexdigest(file_bytes) for _, file_bytes in files)
+    return files, file_keys
 
 def main():
-    st.title('🖼️ Image Resizer with Multiple File Upload')
+    init_opencv()
+
+    st.title('🖼️ Image Resizer')
 
     # Sidebar for additional options
     st.sidebar.header('Resize Settings')
+    mode = st.sidebar.radio('Mode', MODES)
     scale_factor = st.sidebar.slider('Scale Factor', min_value=1.0, max_value=4.0, value=2.0, step=0.5)
+    selected_format = st.sidebar.radio('Download Format', list(FORMATS))
+
+    files, file_keys = get_files(mode)
 
-    # File uploader for multiple files
-    uploaded_files = st.file_uploader(
-        "Upload multiple image files",
-        type=['jpg', 'jpeg', 'png', 'bmp', 'webp'],
-        accept_multiple_files=True,
-        help="Select multiple image files to resize"
-    )
+    if files:
+        results = resize_files(file_keys, files, scale_factor)
+
+        # The single-image view lays images out side by side in columns
+        grid = mode == 'Single image'
+
+        for (file_name, file_bytes), file_key, (_, preview, error) in zip(files, file_keys, results):
+            if error is not None:
+                st.error(f"Error processing {file_name}: {error}")
+                continue
 
-    if uploaded_files:
-        for uploaded_file in uploaded_files:
             try:
-                # Read the image
-                original_image = Image.open(uploaded_file)
+                original_size, original_preview, full_size, previews = preview
 
                 # Display original image
-                st.subheader(f'Original Image: {uploaded_file.name}')
-                st.image(original_image, caption=f'Original Size: {original_image.size}')
-
-                # Resize and display
-                resized_images = resize_image(original_image, scale_factor)
+                st.subheader(f'Original Image: {file_name}')
+                with st.columns(2)[0] if grid else st.container():
+                    st.image(original_preview, caption=f'Original Size: {original_size}')
 
                 # Display resized images
-                st.subheader(f'Resized Images for {uploaded_file.name} (Scale: {scale_factor}x)')
-                for name, img in resized_images.items():
-                    st.image(img, caption=f'{name} - {img.size}')
+                st.subheader(f'Resized Images for {file_name} (Scale: {scale_factor}x)')
+                cols = st.columns(2) if grid else [st.container()]
+                for i, (name, arr) in enumerate(previews.items()):
+                    with cols[i % len(cols)]:
+                        st.image(arr, caption=f'{name} - {full_size}')
 
                 # Download options
-                st.subheader(f'Download Resized Images for {uploaded_file.name}')
-                for name, img in resized_images.items():
-                    # Convert image to bytes
-                    byte_io = BytesIO()
-                    img.save(byte_io, format='PNG')
-                    byte_io.seek(0)
-
-                    st.download_button(
-                        label=f'Download {name}',
-                        data=byte_io,
-                        file_name=f'{uploaded_file.name.split(".")[0]}_resized_{name.lower().replace(" ", "_")}.png',
-                        mime='image/png'
-                    )
+                st.subheader(f'Download Resized Images for {file_name}')
+                fmt = download_format(selected_format, full_size)
+                if fmt != selected_format:
+                    st.caption(f'{selected_format} is not available at {full_size}; downloads use {fmt}.')
+                ext, _, mime = FORMATS[fmt]
+                download_cols = st.columns(len(previews)) if grid else [st.container()]
+                for i, name in enumerate(previews):
+                    with download_cols[i % len(download_cols)]:
+                        st.download_button(
+                            label=f'Download {name}',
+                            data=partial(encode_download, file_key, file_bytes, scale_factor, name, fmt),
+                            file_name=f'{file_name.split(".")[0]}_resized_{name.lower().replace(" ", "_")}{ext}',
+                            mime=mime
+                        )
 
             except Exception as e:
-                st.error(f"Error processing {uploaded_file.name}: {e}")
+                st.error(f"Error processing {file_name}: {e}")
 
 if __name__ == '__main__':
     main()